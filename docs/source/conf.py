@@ -1,9 +1,3 @@
-import os
-import sys
-
-# Ensure the package can be imported for AutoAPI's import resolution
-sys.path.insert(0, os.path.abspath("../../xboinc"))
-
 # -- Project information -----------------------------------------------------
 project = "Xboinc"
 author = (
@@ -22,7 +16,8 @@ extensions = [
     "sphinx_autodoc_typehints",
     "sphinx.ext.mathjax",
     "myst_parser",
-    "autoapi.extension",
+    "autodoc2",
+    "sphinx_remove_toctrees",
 ]
 
 autodoc_default_options = {
@@ -65,9 +60,16 @@ html_theme_options = {
 html_title = f"{project} v{release}"
 add_module_names = False
 
-# -- AutoAPI configuration ---------------------------------------------------
-autoapi_type = "python"
-autoapi_dirs = ["../../xboinc"]
-autoapi_root = "api"
-autoapi_add_toctree_entry = True
-autoapi_keep_files = True
+# -- autodoc2 configuration -------------------------------------------------
+autodoc2_packages = [
+    {
+        "path": "../../xboinc",
+        # Server-side paths and helpers are internal to the BOINC service
+        "exclude_dirs": ["__pycache__", "server"],
+    }
+]
+autodoc2_output_dir = "api"
+autodoc2_render_plugin = "myst"
+
+# Keep the per-module API pages out of the sidebar toctree of every page
+remove_from_toctrees = ["api/*/*.*"]
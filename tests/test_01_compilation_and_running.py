@@ -3,10 +3,21 @@
 # Copyright (c) CERN, 2025.                 #
 ########################################### #
 
+"""
+Tests for generating, compiling and running the Xboinc executable.
+
+Set the environment variable ``XBOINC_TEST_VERBOSE=1`` to run the executable
+with ``--verbose 1`` and to print progress and timing messages.
+"""
+
 import filecmp
+import functools
+import json
 import os
+import shutil
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional, Tuple
 
@@ -16,6 +27,15 @@ import xtrack as xt
 
 import xboinc as xb
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Working directory of the test session, resolved once at import
+_CWD = Path.cwd()
+_VERBOSE = bool(os.environ.get("XBOINC_TEST_VERBOSE"))
+
 
 # NOTE: to have these tests running, you might want to alter some of these parameters!
 class TestConfig:
@@ -34,14 +54,12 @@ class TestConfig:
     INPUT_FILE = "xboinc_input.bin"
     OUTPUT_FILE = "xboinc_state_out.bin"
     CHECKPOINT_FILE = "checkpoint.bin"
-    BINARY_TEST_NAME = f"xboinc_test_{xb.app_version}-x86_64-pc-linux-gnu"
-    BINARY_PROD_NAME = f"xboinc_{xb.app_version}-x86_64-pc-linux-gnu"
 
-    # Timeout for interrupted tests (seconds)
-    CHECKPOINT_TIMEOUT = 15
+    # Maximum time to wait for the first checkpoint (seconds)
+    CHECKPOINT_TIMEOUT = 30
 
     # VCPKG configuration
-    VCPKG_ROOT = Path.cwd().parents[1] / "vcpkg"
+    VCPKG_ROOT = _CWD.parents[1] / "vcpkg"
 
     @classmethod
     def vcpkg_available(cls) -> bool:
@@ -54,44 +72,18 @@ class TestConfig:
             ).exists()
         )
 
-    @classmethod
-    def files_to_clean(cls) -> list[str]:
-        """List of files that should be cleaned up after tests."""
-        return [
-            f"./{cls.OUTPUT_FILE}",
-            f"./{cls.CHECKPOINT_FILE}",
-            f"./{cls.INPUT_FILE}",
-            "./boinc_finish_called",
-            "main.cpp",
-            "CMakeLists.txt",
-            "xtrack.c",
-            "xtrack.h",
-            "xb_input.h",
-            "xtrack_tracker.h",
-            "version.h",
-            cls.BINARY_TEST_NAME,
-            cls.BINARY_PROD_NAME,
-            "xboinc_state_out.bin_2",
-        ]
-
-
-@pytest.fixture(autouse=True)
-def cleanup_files():
-    """Automatically clean up test files before and after each test."""
-
-    def safe_remove(*files):
-        """Remove files silently if they exist."""
-        for file_path in files:
-            try:
-                os.remove(file_path)
-            except FileNotFoundError:
-                pass
 
-    # Cleanup before test
-    safe_remove(*TestConfig.files_to_clean())
-    yield
-    # Cleanup after test
-    safe_remove(*TestConfig.files_to_clean())
+def safe_remove(*files: Path) -> None:
+    """Remove files silently if they exist."""
+    for file_path in files:
+        file_path.unlink(missing_ok=True)
+
+
+@pytest.fixture
+def work_dir(tmp_path, monkeypatch):
+    """Run the test inside its own temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
 
 
 @pytest.fixture
@@ -102,71 +94,221 @@ def skip_version_check():
     xb._skip_xsuite_version_check = False
 
 
-def create_test_particles(
-    at_element: Optional[str] = None,
-) -> Tuple[xt.Line, xt.Particles]:
+@pytest.fixture(scope="session")
+def generated_sources(tmp_path_factory):
+    """Generate the executable sources once per session in a temporary directory."""
+    source_dir = tmp_path_factory.mktemp("sources")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(xb, "_skip_xsuite_version_check", True)
+        mp.chdir(source_dir)
+        xb.generate_executable_source()
+    return source_dir
+
+
+@pytest.fixture(scope="session")
+def compiled_executables(generated_sources, tmp_path_factory):
+    """
+    Compile the executables once per test session.
+
+    The executables are built in a temporary directory of the session (hence
+    of each pytest-xdist worker), starting from the generated sources.
+    Returns a dictionary keyed by ``use_boinc``. The BOINC-enabled entry is
+    None when VCPKG + BOINC is not available.
     """
-    Create a standardized line and particle distribution for testing.
+    build_dir = tmp_path_factory.mktemp("executables")
+    shutil.copytree(generated_sources, build_dir, dirs_exist_ok=True)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(xb, "_skip_xsuite_version_check", True)
+        mp.chdir(build_dir)
+        executables = {
+            False: compile_executable(None, build_dir),
+            True: (
+                compile_executable(TestConfig.VCPKG_ROOT, build_dir)
+                if TestConfig.vcpkg_available()
+                else None
+            ),
+        }
+    yield executables
+    _find_executable.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def base_line() -> xt.Line:
+    """Load the test line and build its tracker once per session."""
+    line = xt.Line.from_json(TestConfig.LINE_FILE)
+    line.build_tracker()
+    return line
+
+
+@pytest.fixture(scope="session")
+def particles_factory(base_line):
+    """
+    Provide a cached factory for the standardized particle distribution.
+
+    The factory takes the element name or index where the particles should
+    start (optional), and returns the shared tracking line together with the
+    particles. Both are shared between tests, hence the particles need to be
+    copied before tracking them.
+    """
+
+    @functools.lru_cache(maxsize=None)
+    def make(
+        at_element: Optional[str] = None,
+    ) -> Tuple[xt.Line, xt.Particles]:
+        x_norm = np.linspace(-15, 15, TestConfig.NUM_PARTICLES)
+        delta = np.linspace(-1.0e-5, 1.0e-5, TestConfig.NUM_PARTICLES)
+
+        particles = base_line.build_particles(
+            x_norm=x_norm,
+            delta=delta,
+            nemitt_x=3.5e-6,
+            nemitt_y=3.5e-6,
+            at_element=at_element,
+        )
+
+        return base_line, particles
+
+    return make
+
+
+# Serialized input files, keyed by the parameters they were generated from
+_input_cache = {}
+
+
+def write_input_file(
+    line: xt.Line,
+    particles: xt.Particles,
+    num_turns: int,
+    directory: Path,
+    ele_stop=None,
+) -> Path:
+    """
+    Create the xboinc input file.
+
+    The serialized input is cached per set of parameters, so repeated calls
+    only write the bytes again. The line and particles are identified by
+    their ``id``, hence they must not be modified in between (which holds
+    for the ones provided by ``particles_factory``).
 
     Parameters
     ----------
-    at_element : str, optional
-        Element name or index where particles should start.
+    line : xt.Line
+        The tracking line.
+    particles : xt.Particles
+        The initial particle distribution.
+    num_turns : int
+        Number of turns to track.
+    directory : Path
+        Directory in which to write the input file.
+    ele_stop : str or int, optional
+        Element name or index where tracking should stop. If None, tracking
+        continues until the end of the line.
 
     Returns
     -------
-    tuple[xt.Line, xt.Particles]
-        The tracking line and initial particle distribution.
+    Path
+        Path to the input file.
     """
-    line = xt.Line.from_json(TestConfig.LINE_FILE)
-    line.build_tracker()
+    input_file = directory / TestConfig.INPUT_FILE
+    key = (id(line), id(particles), num_turns, ele_stop)
+    if key in _input_cache:
+        input_file.write_bytes(_input_cache[key])
+        return input_file
 
-    x_norm = np.linspace(-15, 15, TestConfig.NUM_PARTICLES)
-    delta = np.linspace(-1.0e-5, 1.0e-5, TestConfig.NUM_PARTICLES)
-
-    particles = line.build_particles(
-        x_norm=x_norm,
-        delta=delta,
-        nemitt_x=3.5e-6,
-        nemitt_y=3.5e-6,
-        at_element=at_element,
+    xb_input = xb.XbInput(
+        line=line,
+        particles=particles,
+        num_turns=num_turns,
+        checkpoint_every=TestConfig.CHECKPOINT_INTERVAL,
+        ele_stop=-1 if ele_stop is None else ele_stop,
     )
+    xb_input.to_binary(input_file)
+    _input_cache[key] = input_file.read_bytes()
+    return input_file
+
 
-    return line, particles
+@functools.lru_cache(maxsize=4)
+def _find_executable(
+    use_boinc: bool, app_version: str, directory: Path
+) -> Optional[Path]:
+    app_name = "xboinc" if use_boinc else "xboinc_test"
+    prefix = f"{app_name}_{app_version}-"
 
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.startswith(prefix) and entry.is_file():
+                return Path(entry.path)
+    return None
 
-def get_executable_path(use_boinc: bool) -> Path:
+
+def find_executable(use_boinc: bool, directory: Path) -> Optional[Path]:
     """
-    Get the path to the compiled executable, compiling if necessary.
+    Find a compiled executable in a directory.
+
+    The lookup is cached; call ``_find_executable.cache_clear()`` when
+    executables are created. A cached path that no longer exists triggers a
+    new lookup.
 
     Parameters
     ----------
     use_boinc : bool
-        Whether to get the BOINC-enabled executable.
+        Whether to look for the BOINC-enabled executable.
+    directory : Path
+        Directory to search.
+
+    Returns
+    -------
+    Path or None
+        Path to the executable file, or None if it does not exist.
+    """
+    executable = _find_executable(use_boinc, xb.app_version, directory)
+    if executable is not None and not executable.exists():
+        _find_executable.cache_clear()
+        executable = _find_executable(use_boinc, xb.app_version, directory)
+    return executable
+
+
+def compile_executable(vcpkg_root: Optional[Path], directory: Path) -> Path:
+    """
+    Compile the xboinc executable and return its path.
+
+    Parameters
+    ----------
+    vcpkg_root : Path, optional
+        Path to the VCPKG installation. If None, the executable is built
+        without the BOINC API.
+    directory : Path
+        The directory to compile in, which has to be the working directory.
 
     Returns
     -------
     Path
         Path to the executable file.
     """
-    app_name = "xboinc" if use_boinc else "xboinc_test"
-    pattern = f"{app_name}_{xb.app_version}-*"
+    # The sources are kept: generate_executable() resolves the paths of the
+    # sources to remove against the working directory at import time. They
+    # are cleaned up together with the temporary directory.
+    xb.generate_executable(keep_source=True, vcpkg_root=vcpkg_root)
+    _find_executable.cache_clear()
+
+    executable = find_executable(vcpkg_root is not None, directory)
+    if executable is None:
+        raise RuntimeError(f"Could not create executable (vcpkg_root={vcpkg_root})")
 
-    exec_files = list(Path.cwd().glob(pattern))
-    if not exec_files or not exec_files[0].exists():
-        # Need to compile
-        vcpkg_root = TestConfig.VCPKG_ROOT if use_boinc else None
-        test_compilation(vcpkg_root, skip_version_check, cleanup_files)
-        exec_files = list(Path.cwd().glob(pattern))
+    return executable
 
-    if not exec_files:
-        raise RuntimeError(f"Could not find or create executable matching {pattern}")
 
-    return exec_files[0]
+def log(message: str) -> None:
+    """Print a progress message, only when ``XBOINC_TEST_VERBOSE`` is set."""
+    if _VERBOSE:
+        print(message)
 
 
 def run_xboinc_tracking(
-    executable: Path, timeout: Optional[float] = None
+    executable: Path,
+    timeout: Optional[float] = None,
+    cwd: Optional[Path] = None,
+    capture: bool = False,
 ) -> subprocess.CompletedProcess:
     """
     Execute the xboinc tracking application.
@@ -177,6 +319,12 @@ def run_xboinc_tracking(
         Path to the executable to run.
     timeout : float, optional
         Timeout in seconds. If None, no timeout is applied.
+    cwd : Path, optional
+        Directory to run in, containing the input file. Defaults to the
+        working directory.
+    capture : bool, optional
+        Whether to capture stdout. If False (default), it is discarded.
+        Stderr, which only carries error messages, is always captured.
 
     Returns
     -------
@@ -185,25 +333,83 @@ def run_xboinc_tracking(
 
     Raises
     ------
-    subprocess.CalledProcessError
+    RuntimeError
         If the tracking execution fails.
     subprocess.TimeoutExpired
         If the execution times out.
     """
-    cmd_args = [str(executable), "--verbose", "1"]
+    cmd_args = [str(executable)]
+    if _VERBOSE:
+        cmd_args += ["--verbose", "1"]
 
     try:
         return subprocess.run(
             cmd_args,
             check=True,
-            stdout=subprocess.PIPE,
+            stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
             stderr=subprocess.PIPE,
             timeout=timeout,
+            cwd=cwd,
         )
     except subprocess.CalledProcessError as e:
         raise RuntimeError(f"Tracking failed: {e.stderr.decode()}") from e
 
 
+def interrupt_after_checkpoint(
+    executable: Path, work_dir: Path, state_size: int
+) -> None:
+    """
+    Run the xboinc tracking application and kill it after its first checkpoint.
+
+    The checkpoint file is written in place, hence it is only considered
+    complete when it has the size of a full simulation state.
+
+    Parameters
+    ----------
+    executable : Path
+        Path to the executable to run.
+    work_dir : Path
+        Directory to run in, containing the input file.
+    state_size : int
+        Size in bytes of the simulation state (e.g. of an output file).
+
+    Raises
+    ------
+    RuntimeError
+        If the execution ends before a checkpoint is written.
+    TimeoutError
+        If no checkpoint is written within ``TestConfig.CHECKPOINT_TIMEOUT``.
+    """
+    checkpoint_file = work_dir / TestConfig.CHECKPOINT_FILE
+    deadline = time.perf_counter() + TestConfig.CHECKPOINT_TIMEOUT
+    process = subprocess.Popen(
+        [str(executable)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        cwd=work_dir,
+    )
+    try:
+        while True:
+            try:
+                if checkpoint_file.stat().st_size == state_size:
+                    return
+            except FileNotFoundError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(
+                    "Execution ended before a checkpoint was written "
+                    f"(exit code {process.returncode})"
+                )
+            if time.perf_counter() > deadline:
+                raise TimeoutError(
+                    f"No checkpoint written within {TestConfig.CHECKPOINT_TIMEOUT}s"
+                )
+            time.sleep(0.05)
+    finally:
+        process.kill()
+        process.wait()
+
+
 def assert_particles_equal(
     particles1: xt.Particles, particles2: xt.Particles, context: str
 ) -> None:
@@ -217,30 +423,79 @@ def assert_particles_equal(
     context : str
         Description of the comparison context for error messages.
     """
-    attributes = [
-        "particle_id",
-        "state",
-        "at_turn",
-        "x",
-        "y",
-        "zeta",
-        "px",
-        "py",
-        "delta",
+    # Integer and float attributes are stacked separately to keep their dtype
+    attribute_groups = [
+        ["particle_id", "state", "at_turn"],
+        ["x", "y", "zeta", "px", "py", "delta"],
     ]
 
-    for attr in attributes:
-        values1 = getattr(particles1, attr)
-        values2 = getattr(particles2, attr)
-        assert np.array_equal(
-            values1, values2
-        ), f"{context}: {attr} values are not equal"
+    for attributes in attribute_groups:
+        values1 = np.stack([getattr(particles1, attr) for attr in attributes])
+        values2 = np.stack([getattr(particles2, attr) for attr in attributes])
+        assert (
+            values1.shape == values2.shape
+        ), f"{context}: number of particles is not equal"
+
+        # Bitwise identical values need no element-wise comparison
+        if values1.dtype == values2.dtype and values1.tobytes() == values2.tobytes():
+            continue
+
+        differs = (values1 != values2).any(axis=1)
+        assert not differs.any(), (
+            f"{context}: {[attributes[i] for i in np.flatnonzero(differs)]} "
+            "values are not equal"
+        )
+
+
+def _json_default(obj):
+    """Convert numpy objects for the canonical JSON representation."""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def canonical_json(data: dict) -> bytes:
+    """
+    Serialize a dictionary to canonical (key-sorted) JSON bytes.
+
+    Uses orjson when available, and the standard library otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            default=_json_default,
+            option=orjson.OPT_SORT_KEYS
+            | orjson.OPT_SERIALIZE_NUMPY
+            | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(data, sort_keys=True, default=_json_default).encode()
+
+
+def dicts_match(reference: dict, reference_json: bytes, data: dict) -> bool:
+    """
+    Check that a dictionary is equal to a reference dictionary.
+
+    Identical canonical JSON implies equality, so the recursive comparison
+    is only needed when the serializations differ.
+
+    Parameters
+    ----------
+    reference : dict
+        The reference dictionary.
+    reference_json : bytes
+        The canonical JSON of the reference, see canonical_json().
+    data : dict
+        The dictionary to compare.
+    """
+    if canonical_json(data) == reference_json:
+        return True
+    return xt.line._dicts_equal(reference, data)
 
 
-def test_generate_input(skip_version_check, cleanup_files):
+def test_generate_input(particles_factory, skip_version_check, work_dir):
     """Test input file generation and round-trip consistency."""
-    line, particles = create_test_particles()
-    input_file = Path.cwd() / TestConfig.INPUT_FILE
+    line, particles = particles_factory()
+    input_file = work_dir / TestConfig.INPUT_FILE
 
     # Create input object
     xb_input = xb.XbInput(
@@ -252,15 +507,21 @@ def test_generate_input(skip_version_check, cleanup_files):
 
     # Verify input object integrity
     particles_dict_original = particles.to_dict()
+    particles_json_original = canonical_json(particles_dict_original)
     particles_dict_input = xb_input.particles.to_dict()
 
-    assert xt.line._dicts_equal(particles_dict_original, particles_dict_input)
+    assert dicts_match(
+        particles_dict_original, particles_json_original, particles_dict_input
+    )
     assert list(line.element_names) == list(xb_input.line.element_names)
 
     line_dict_original = line.to_dict()
+    elements_json_original = canonical_json(line_dict_original["elements"])
     line_dict_input = xb_input.line.to_dict()
-    assert xt.line._dicts_equal(
-        line_dict_original["elements"], line_dict_input["elements"]
+    assert dicts_match(
+        line_dict_original["elements"],
+        elements_json_original,
+        line_dict_input["elements"],
     )
 
     # Test file I/O
@@ -271,19 +532,51 @@ def test_generate_input(skip_version_check, cleanup_files):
     loaded_input = xb.XbInput.from_binary(input_file)
     particles_dict_loaded = loaded_input.particles.to_dict()
 
-    assert xt.line._dicts_equal(particles_dict_original, particles_dict_loaded)
+    assert dicts_match(
+        particles_dict_original, particles_json_original, particles_dict_loaded
+    )
     assert list(line.element_names) == list(loaded_input.line.element_names)
 
-    line_dict_loaded = loaded_input.line.to_dict()
-    assert xt.line._dicts_equal(
-        line_dict_original["elements"], line_dict_loaded["elements"]
+    # The elements were checked on the in-memory input above, so identical
+    # buffers imply identical loaded elements
+    assert (
+        loaded_input._buffer.buffer.tobytes() == xb_input._buffer.buffer.tobytes()
+    ), "Loaded input buffer differs from the written one"
+
+
+def test_input_line_is_not_shared(skip_version_check):
+    """Test that changes to a line returned by XbInput.line do not stick."""
+    line = xt.Line(
+        elements=[xt.Drift(length=1.0), xt.Multipole(knl=[1e-4])],
+        element_names=["d", "m"],
     )
+    xb_input = xb.XbInput(line=line, particles=xt.Particles(x=[0.0]), num_turns=10)
 
+    returned_line = xb_input.line
+    returned_line.append_element(xt.Drift(length=1.0), "extra")
 
-def test_source_generation(skip_version_check, cleanup_files):
-    """Test C++ source code generation."""
-    xb.generate_executable_source()
+    assert returned_line.element_names[-1] == "extra"
+    assert list(xb_input.line.element_names) == ["d", "m"]
+    assert len(xb_input.line_metadata.elements) == 2
+
+
+def test_input_uses_current_line_elements(skip_version_check):
+    """Test that an element replaced under the same name ends up in the next input."""
+    line = xt.Line(
+        elements=[xt.Drift(length=1.0), xt.Drift(length=2.0)],
+        element_names=["a", "b"],
+    )
+    line.build_tracker()
+    xb.XbInput(line=line, particles=xt.Particles(x=[0.0]), num_turns=10)
 
+    line.element_dict["b"] = xt.Multipole(knl=[1e-4])
+    xb_input = xb.XbInput(line=line, particles=xt.Particles(x=[0.0]), num_turns=10)
+
+    assert isinstance(xb_input.line.element_dict["b"], xt.Multipole)
+
+
+def test_source_generation(generated_sources):
+    """Test C++ source code generation."""
     expected_files = [
         "main.cpp",
         "CMakeLists.txt",
@@ -295,7 +588,7 @@ def test_source_generation(skip_version_check, cleanup_files):
     ]
 
     for filename in expected_files:
-        file_path = Path.cwd() / filename
+        file_path = generated_sources / filename
         assert file_path.exists(), f"Generated source file {filename} not found"
 
 
@@ -313,18 +606,11 @@ def test_source_generation(skip_version_check, cleanup_files):
     ],
     ids=["w/o BOINC api", "with BOINC api"],
 )
-def test_compilation(vcpkg_root, skip_version_check, cleanup_files):
+def test_compilation(vcpkg_root, compiled_executables):
     """Test compilation of the xboinc executable."""
-    keep_source = vcpkg_root is None
-    xb.generate_executable(keep_source=keep_source, vcpkg_root=vcpkg_root)
-
-    app_name = "xboinc" if vcpkg_root else "xboinc_test"
-    pattern = f"{app_name}_{xb.app_version}-*"
-    exec_files = list(Path.cwd().glob(pattern))
-
-    assert len(exec_files) == 1, f"Expected exactly one executable matching {pattern}"
-    executable = exec_files[0]
+    executable = compiled_executables[vcpkg_root is not None]
 
+    assert executable is not None, "Executable was not created"
     assert executable.exists(), f"Executable {executable} does not exist"
     assert os.access(executable, os.X_OK), f"Executable {executable} is not executable"
 
@@ -343,53 +629,59 @@ def test_compilation(vcpkg_root, skip_version_check, cleanup_files):
     ],
     ids=["w/o BOINC api", "with BOINC api"],
 )
-def test_tracking_execution(use_boinc, skip_version_check, cleanup_files):
+def test_tracking_execution(
+    use_boinc,
+    compiled_executables,
+    particles_factory,
+    skip_version_check,
+    work_dir,
+):
     """Test particle tracking execution and output validation."""
-    # Ensure input file exists
-    if not (Path.cwd() / TestConfig.INPUT_FILE).exists():
-        test_generate_input(skip_version_check, cleanup_files)
+    write_input_file(*particles_factory(), TestConfig.NUM_TURNS_LARGE, work_dir)
 
-    executable = get_executable_path(use_boinc)
+    executable = compiled_executables[use_boinc]
 
     # Execute tracking
-    start_time = time.time()
-    run_xboinc_tracking(executable)
-    execution_time = round(time.time() - start_time, 1)
+    start_time = time.perf_counter()
+    run_xboinc_tracking(executable, cwd=work_dir)
+    execution_time = time.perf_counter() - start_time
 
     app_name = "Xboinc" if use_boinc else "Xboinc Test"
-    print(f"Tracking ({app_name}) completed in {execution_time}s.")
+    log(f"Tracking ({app_name}) completed in {execution_time:.1f}s.")
 
     # Validate output
-    output_file = Path.cwd() / TestConfig.OUTPUT_FILE
+    output_file = work_dir / TestConfig.OUTPUT_FILE
     assert output_file.exists(), "Output file was not created"
 
     xb_state = xb.XbState.from_binary(output_file)
     particles = xb_state.particles
 
     # Check simulation completion
-    surviving_particles = len(particles.state[particles.state > 0])
-    print(f"{surviving_particles}/{TestConfig.NUM_PARTICLES} particles survived.")
+    alive = particles.state > 0
+    surviving_particles = np.count_nonzero(alive)
+    log(f"{surviving_particles}/{TestConfig.NUM_PARTICLES} particles survived.")
 
     assert np.allclose(
-        particles.s[particles.state > 0], 0, rtol=1e-6, atol=0
+        particles.s[alive], 0, rtol=1e-6, atol=0
     ), "Unexpected s coordinate"
     assert np.all(
-        particles.at_turn[particles.state > 0] == TestConfig.NUM_TURNS_LARGE
+        particles.at_turn[alive] == TestConfig.NUM_TURNS_LARGE
     ), "Unexpected particle turn count"
     assert (
         xb_state.i_turn == TestConfig.NUM_TURNS_LARGE
     ), "Unexpected simulation turn count"
 
     # Verify particle evolution (not all values should be identical)
-    for coord in ["x", "px", "y", "py"]:
-        values = getattr(particles, coord)
-        assert not np.allclose(
-            values, values[0], rtol=1e-4, atol=0
-        ), f"All {coord} values are identical"
+    coords = ["x", "px", "y", "py"]
+    values = np.stack([getattr(particles, coord) for coord in coords])
+    identical = np.isclose(values, values[:, :1], rtol=1e-4, atol=0).all(axis=1)
+    assert not identical.any(), (
+        f"All {[coords[i] for i in np.flatnonzero(identical)]} values are identical"
+    )
 
     # Test output file round-trip
     suffix = "_boinc" if use_boinc else ""
-    output_file_2 = Path.cwd() / f"{TestConfig.OUTPUT_FILE}{suffix}_2"
+    output_file_2 = work_dir / f"{TestConfig.OUTPUT_FILE}{suffix}_2"
     xb_state.to_binary(output_file_2)
     assert filecmp.cmp(
         output_file, output_file_2, shallow=False
@@ -410,161 +702,176 @@ def test_tracking_execution(use_boinc, skip_version_check, cleanup_files):
     ],
     ids=["w/o BOINC api", "with BOINC api"],
 )
-def test_checkpoint_functionality(use_boinc, skip_version_check, cleanup_files):
+def test_checkpoint_functionality(
+    use_boinc,
+    compiled_executables,
+    particles_factory,
+    skip_version_check,
+    work_dir,
+):
     """Test checkpoint creation and recovery functionality."""
-    # Ensure prerequisites exist
-    if not (Path.cwd() / TestConfig.INPUT_FILE).exists():
-        test_generate_input(skip_version_check, cleanup_files)
-
-    # Get reference output for comparison
+    # Create the input file and the reference output for comparison
+    test_tracking_execution(
+        use_boinc,
+        compiled_executables,
+        particles_factory,
+        skip_version_check,
+        work_dir,
+    )
     suffix = "_boinc" if use_boinc else ""
-    reference_output = Path.cwd() / f"{TestConfig.OUTPUT_FILE}{suffix}_2"
-    if not reference_output.exists():
-        test_tracking_execution(use_boinc, skip_version_check, cleanup_files)
+    reference_output = work_dir / f"{TestConfig.OUTPUT_FILE}{suffix}_2"
 
-    executable = get_executable_path(use_boinc)
+    executable = compiled_executables[use_boinc]
 
-    # Phase 1: Run with timeout to create checkpoint
-    print(
-        f"Will interrupt execution after {TestConfig.CHECKPOINT_TIMEOUT}s to test checkpointing."
+    # Phase 1: Interrupt the execution once the first checkpoint is written
+    start_time = time.perf_counter()
+    interrupt_after_checkpoint(
+        executable, work_dir, reference_output.stat().st_size
+    )
+    interrupt_time = time.perf_counter()
+    log(
+        f"Interrupted after {interrupt_time - start_time:.1f}s. Checking for checkpoint."
     )
-
-    start_time = time.time()
-    try:
-        run_xboinc_tracking(executable, timeout=TestConfig.CHECKPOINT_TIMEOUT)
-        raise ValueError(
-            "Execution completed before timeout - increase CHECKPOINT_TIMEOUT"
-        )
-    except subprocess.TimeoutExpired:
-        interrupt_time = time.time()
-        print(
-            f"Interrupted after {round(interrupt_time - start_time, 1)}s. Checking for checkpoint."
-        )
 
     # Verify checkpoint was created
-    checkpoint_file = Path.cwd() / TestConfig.CHECKPOINT_FILE
+    checkpoint_file = work_dir / TestConfig.CHECKPOINT_FILE
     assert (
         checkpoint_file.exists()
     ), "Checkpoint file was not created during interrupted execution"
 
     # Phase 2: Resume from checkpoint
-    print("Resuming from checkpoint...")
+    log("Resuming from checkpoint...")
     # Remove output files but keep checkpoint
-    for file_path in [f"./{TestConfig.OUTPUT_FILE}", "./boinc_finish_called"]:
-        try:
-            os.remove(file_path)
-        except FileNotFoundError:
-            pass
+    safe_remove(
+        work_dir / TestConfig.OUTPUT_FILE, work_dir / "boinc_finish_called"
+    )
 
-    resume_start = time.time()
-    run_xboinc_tracking(executable)
-    total_time = time.time() - start_time
-    resume_time = time.time() - resume_start
+    resume_start = time.perf_counter()
+    run_xboinc_tracking(executable, cwd=work_dir)
+    resume_end = time.perf_counter()
+    total_time = resume_end - start_time
+    resume_time = resume_end - resume_start
 
     app_name = "Xboinc" if use_boinc else "Xboinc Test"
-    print(
-        f"Resumed tracking ({app_name}) completed in {round(resume_time, 1)}s "
-        f"(total: {round(total_time, 1)}s)."
+    log(
+        f"Resumed tracking ({app_name}) completed in {resume_time:.1f}s "
+        f"(total: {total_time:.1f}s)."
     )
 
     # Compare resumed result with reference
-    output_file = Path.cwd() / TestConfig.OUTPUT_FILE
+    output_file = work_dir / TestConfig.OUTPUT_FILE
     assert output_file.exists(), "Output file not created after resume"
     assert filecmp.cmp(
         output_file, reference_output, shallow=False
     ), "Checkpointed result differs from reference"
 
 
-def test_consistency_with_xtrack(skip_version_check, cleanup_files):
-    """Test that xboinc results match xtrack reference implementation."""
-    # Test different starting positions
-    test_positions = [None, "ip2", 3500]
-
-    for at_element in test_positions:
-        print(f"Testing consistency at element: {at_element}")
+def run_case(executable: Path, work_dir: Path) -> Path:
+    """
+    Run one tracking case in its own directory.
 
-        line, particles = create_test_particles(at_element=at_element)
+    Parameters
+    ----------
+    executable : Path
+        Path to the executable to run.
+    work_dir : Path
+        Directory containing the input file for this case.
 
-        # Create input file
-        input_file = Path.cwd() / TestConfig.INPUT_FILE
-        xb_input = xb.XbInput(
-            line=line,
-            particles=particles,
-            num_turns=TestConfig.NUM_TURNS_SMALL,
-            checkpoint_every=TestConfig.CHECKPOINT_INTERVAL,
-        )
-        xb_input.to_binary(input_file)
+    Returns
+    -------
+    Path
+        Path to the output file.
+    """
+    run_xboinc_tracking(executable, cwd=work_dir)
+    return work_dir / TestConfig.OUTPUT_FILE
 
-        # Run reference tracking with xtrack
-        particles_reference = particles.copy()
-        line.track(particles_reference, num_turns=TestConfig.NUM_TURNS_SMALL, time=True)
 
-        # Test standalone xboinc
-        executable_test = get_executable_path(use_boinc=False)
-        run_xboinc_tracking(executable_test)
+def assert_consistency_with_xtrack(
+    at_element, ele_stop, compiled_executables, particles_factory, work_dir
+) -> None:
+    """
+    Assert that xboinc results match the xtrack reference implementation.
 
-        output_file = Path.cwd() / TestConfig.OUTPUT_FILE
-        xb_state = xb.XbState.from_binary(output_file)
+    Parameters
+    ----------
+    at_element : str or int, optional
+        Element name or index where the particles start.
+    ele_stop : str or int, optional
+        Element name or index where tracking should stop.
+    compiled_executables : dict
+        The executables from the ``compiled_executables`` fixture.
+    particles_factory : callable
+        The factory from the ``particles_factory`` fixture.
+    work_dir : Path
+        Directory to run in.
+    """
+    line, particles = particles_factory(at_element)
+    input_file = write_input_file(
+        line,
+        particles,
+        TestConfig.NUM_TURNS_SMALL,
+        work_dir,
+        ele_stop=ele_stop,
+    )
 
-        assert_particles_equal(
-            particles_reference,
-            xb_state.particles,
-            f"xboinc_test vs xtrack (at_element={at_element})",
-        )
+    # Run reference tracking with xtrack
+    particles_reference = particles.copy()
+    line.track(
+        particles_reference,
+        num_turns=TestConfig.NUM_TURNS_SMALL,
+        time=True,
+        ele_stop=ele_stop,
+    )
 
-        # Test BOINC-enabled xboinc if available
-        if TestConfig.vcpkg_available():
-            executable_boinc = get_executable_path(use_boinc=True)
-            run_xboinc_tracking(executable_boinc)
+    # Test both executables (if available), each in its own directory
+    runs = {}
+    for use_boinc, exec_name in [(False, "xboinc_test"), (True, "xboinc")]:
+        if compiled_executables[use_boinc] is None:
+            continue
+        run_dir = work_dir / exec_name
+        run_dir.mkdir()
+        shutil.copy(input_file, run_dir)
+        runs[exec_name] = (compiled_executables[use_boinc], run_dir)
+
+    with ThreadPoolExecutor(max_workers=len(runs)) as executor:
+        futures = {
+            executor.submit(run_case, executable, run_dir): exec_name
+            for exec_name, (executable, run_dir) in runs.items()
+        }
+        for future in as_completed(futures):
+            exec_name = futures[future]
+            xb_state = xb.XbState.from_binary(future.result())
 
-            xb_state_boinc = xb.XbState.from_binary(output_file)
             assert_particles_equal(
                 particles_reference,
-                xb_state_boinc.particles,
-                f"xboinc vs xtrack (at_element={at_element})",
+                xb_state.particles,
+                f"{exec_name} vs xtrack (at_element={at_element}, ele_stop={ele_stop})",
             )
 
-    # Test different stop elements
-    stop_elements = ["ip2", 3500]
-
-    for ele_stop in stop_elements:
-        print(f"Testing consistency with stop element: {ele_stop}")
 
-        line, particles = create_test_particles()
-
-        # Create input with stop element
-        input_file = Path.cwd() / TestConfig.INPUT_FILE
-        xb_input = xb.XbInput(
-            line=line,
-            particles=particles,
-            num_turns=TestConfig.NUM_TURNS_SMALL,
-            checkpoint_every=TestConfig.CHECKPOINT_INTERVAL,
-            ele_stop=ele_stop,
-        )
-        xb_input.to_binary(input_file)
-
-        # Run reference tracking
-        particles_reference = particles.copy()
-        line.track(
-            particles_reference,
-            num_turns=TestConfig.NUM_TURNS_SMALL,
-            time=True,
-            ele_stop=ele_stop,
-        )
-
-        # Test both executables
-        for use_boinc, exec_name in [(False, "xboinc_test"), (True, "xboinc")]:
-            if use_boinc and not TestConfig.vcpkg_available():
-                continue
-
-            executable = get_executable_path(use_boinc)
-            run_xboinc_tracking(executable)
+@pytest.mark.parametrize("at_element", [None, "ip2", 3500])
+def test_consistency_with_xtrack_at_element(
+    at_element,
+    compiled_executables,
+    particles_factory,
+    skip_version_check,
+    work_dir,
+):
+    """Test that xboinc matches xtrack when starting at a given element."""
+    assert_consistency_with_xtrack(
+        at_element, None, compiled_executables, particles_factory, work_dir
+    )
 
-            output_file = Path.cwd() / TestConfig.OUTPUT_FILE
-            xb_state = xb.XbState.from_binary(output_file)
 
-            assert_particles_equal(
-                particles_reference,
-                xb_state.particles,
-                f"{exec_name} vs xtrack (ele_stop={ele_stop})",
-            )
+@pytest.mark.parametrize("ele_stop", ["ip2", 3500])
+def test_consistency_with_xtrack_ele_stop(
+    ele_stop,
+    compiled_executables,
+    particles_factory,
+    skip_version_check,
+    work_dir,
+):
+    """Test that xboinc matches xtrack when stopping at a given element."""
+    assert_consistency_with_xtrack(
+        None, ele_stop, compiled_executables, particles_factory, work_dir
+    )
@@ -61,6 +61,11 @@ def get_server_file_paths(account: str) -> Dict[str, Path]:
     }
 
 
+# The test account is fixed, so the server file paths are computed only once
+_SERVER_FILE_PATHS = get_server_file_paths(TestConfig.TEST_ACCOUNT)
+_SERVER_FILE_NAMES = {key: path.name for key, path in _SERVER_FILE_PATHS.items()}
+
+
 def load_json_file(file_path: Path) -> Dict[str, Any]:
     """
     Load and return JSON data from a file.
@@ -147,7 +152,7 @@ def assert_registration_files(
     files_in_dropdir = set(os.listdir(dropdir))
     for file_key in register_files:
         file_path = file_paths[file_key]
-        file_name = file_path.name
+        file_name = _SERVER_FILE_NAMES[file_key]
         if should_exist:
             # print(f"Checking registration file {file_path}")
             assert (
@@ -167,7 +172,7 @@ def assert_registration_files(
 
     for file_key in deregister_files:
         file_path = file_paths[file_key]
-        file_name = file_path.name
+        file_name = _SERVER_FILE_NAMES[file_key]
         assert (
             file_name not in files_in_dropdir
         ), f"Deregistration file {file_path} should not exist"
@@ -189,7 +194,7 @@ def assert_deregistration_files(file_paths: Dict[str, Path], dropdir: Path) -> N
     # Registration files should not exist
     register_files = ["register", "dev_register"]
     for file_key in register_files:
-        file_name = file_paths[file_key].name
+        file_name = _SERVER_FILE_NAMES[file_key]
         assert (
             file_name not in files_in_dropdir
         ), f"Registration file {file_name} should not exist after deregistration"
@@ -197,7 +202,7 @@ def assert_deregistration_files(file_paths: Dict[str, Path], dropdir: Path) -> N
     # Deregistration files should exist
     deregister_files = ["deregister", "dev_deregister"]
     for file_key in deregister_files:
-        file_name = file_paths[file_key].name
+        file_name = _SERVER_FILE_NAMES[file_key]
         assert (
             file_name in files_in_dropdir
         ), f"Deregistration file {file_name} should exist"
@@ -208,13 +213,15 @@ def assert_deregistration_files(file_paths: Dict[str, Path], dropdir: Path) -> N
 @pytest.fixture
 def server_files():
     """Fixture to provide server file paths and cleanup after tests."""
-    file_paths = get_server_file_paths(TestConfig.TEST_ACCOUNT)
+    file_paths = _SERVER_FILE_PATHS
     yield file_paths
 
-    # Cleanup all server files after test
-    for file_path in file_paths.values():
-        if file_path.exists():
-            file_path.unlink()
+    # Cleanup all server files after test, with a single listing of the dropdir
+    file_names = set(_SERVER_FILE_NAMES.values())
+    with os.scandir(dropdir) as entries:
+        for entry in entries:
+            if entry.name in file_names:
+                os.unlink(entry.path)
 
 
 @pytest.mark.parametrize(
@@ -3,7 +3,11 @@
 # Copyright (c) CERN, 2025.                 #
 ########################################### #
 
+import datetime
+import fnmatch
+import gc
 import os
+import re
 import shutil
 import tarfile
 import time
@@ -12,7 +16,6 @@ from pathlib import Path
 from xaux import FsPath
 
 import numpy as np
-import pandas as pd
 import pytest
 import xpart as xp
 import xtrack as xt
@@ -20,6 +23,15 @@ import xtrack as xt
 import xboinc as xb
 
 
+# Timestamp of a submitted tar (as generated by xboinc.server.timestamp)
+_TAR_RE = re.compile(
+    r".*__(\d{4})-(\d{2})-(\d{2})_(\d{2})-(\d{2})-(\d{2})\.tar(?:\.gz)?"
+)
+
+# Timestamp in the name of a job file in the archive
+_MEMBER_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}\.\d{3}")
+
+
 # NOTE: to have these tests running, you might want to alter some of these parameters!
 class TestConfig:
     """Configuration constants for submission and retrieval tests."""
@@ -41,6 +53,7 @@ class TestConfig:
     NUM_PARTICLES = 5000
     CHECKPOINT_EVERY = 25
     PARTICLES_PER_JOB = 500
+    RANDOM_SEED = 42
 
     # Timing
     SUBMISSION_DELAY = 5  # seconds between submissions
@@ -83,18 +96,34 @@ def registered_user():
     xb.deregister("testuser")
 
 
+def remove_with_prefix(directory: Path, prefix: str) -> None:
+    """
+    Remove all files and directories in a directory that begin with a prefix.
+
+    Parameters
+    ----------
+    directory : Path
+        Directory to clean.
+    prefix : str
+        Prefix of the names to remove.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.startswith(prefix):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+
+
 @pytest.fixture
 def clean_testuser_files():
     """Clean up test user tar files before and after tests."""
-    output_dir = TestConfig.OUTPUT_DIR
 
     def cleanup():
         """Remove all files and directories that begin with 'testuser'."""
-        for file_path in output_dir.glob(f"testuser__*"):
-            if file_path.is_dir():
-                shutil.rmtree(file_path)
-            else:
-                file_path.unlink()
+        remove_with_prefix(TestConfig.OUTPUT_DIR, "testuser__")
 
     cleanup()
     yield
@@ -108,11 +137,7 @@ def clean_directories():
     def cleanup():
         """Remove all test files and directories."""
         for directory in [TestConfig.INPUT_DIR, TestConfig.OUTPUT_DIR]:
-            for file_path in directory.glob(f"{TestConfig.TEST_ACCOUNT}__*"):
-                if file_path.is_dir():
-                    shutil.rmtree(file_path)
-                else:
-                    file_path.unlink()
+            remove_with_prefix(directory, f"{TestConfig.TEST_ACCOUNT}__")
 
     cleanup()
     yield
@@ -133,32 +158,6 @@ def create_test_line() -> xt.Line:
     )
 
 
-def create_random_particles(
-    num_particles: int, x_sigma: float = 0.01, y_sigma: float = 0.003
-) -> xp.Particles:
-    """
-    Create particles with random initial conditions.
-
-    Parameters
-    ----------
-    num_particles : int
-        Number of particles to create.
-    x_sigma : float
-        Standard deviation for x distribution.
-    y_sigma : float
-        Standard deviation for y distribution.
-
-    Returns
-    -------
-    xp.Particles
-        Particles object with random initial conditions.
-    """
-    return xp.Particles(
-        x=np.random.normal(0, x_sigma, num_particles),
-        y=np.random.normal(0, y_sigma, num_particles),
-    )
-
-
 def submit_study_jobs(
     user: str,
     study_name: str,
@@ -187,14 +186,17 @@ def submit_study_jobs(
     """
     jobs = xb.JobSubmitter(user=user, study_name=study_name, line=line, dev_server=True)
 
+    # Draw the initial conditions of all jobs at once, and slice them per job
+    rng = np.random.default_rng(TestConfig.RANDOM_SEED)
+    all_xy = rng.standard_normal(
+        (TestConfig.num_jobs(), TestConfig.PARTICLES_PER_JOB, 2)
+    ) * np.array([x_sigma, y_sigma])
+
     for i in range(TestConfig.num_jobs()):
-        particles = create_random_particles(
-            TestConfig.PARTICLES_PER_JOB, x_sigma, y_sigma
-        )
         jobs.add(
             job_name=f"{study_name}_job{i}",
             num_turns=TestConfig.NUM_TURNS,
-            particles=particles,
+            particles=xp.Particles(x=all_xy[i, :, 0], y=all_xy[i, :, 1]),
             checkpoint_every=TestConfig.CHECKPOINT_EVERY,
         )
 
@@ -202,6 +204,28 @@ def submit_study_jobs(
     return jobs
 
 
+def read_unsubmitted_archive(jobs: xb.JobSubmitter) -> dict:
+    """
+    Close the archive of an unsubmitted JobSubmitter and read its members.
+
+    Parameters
+    ----------
+    jobs : xb.JobSubmitter
+        The job manager, holding at least one job.
+
+    Returns
+    -------
+    dict
+        The content of each member, keyed by its name without the timestamp.
+    """
+    jobs._open_archive().close()
+    with tarfile.open(jobs._tar.name) as tar:
+        return {
+            _MEMBER_TIMESTAMP_RE.sub("", member.name): tar.extractfile(member).read()
+            for member in tar.getmembers()
+        }
+
+
 def validate_tar_contents(tar_path: Path, expected_jobs: int, user: str) -> None:
     """
     Validate the contents of a submitted tar file.
@@ -217,27 +241,24 @@ def validate_tar_contents(tar_path: Path, expected_jobs: int, user: str) -> None
     """
     assert tar_path.exists() and tar_path.stat().st_size > 0
 
-    with tarfile.open(tar_path) as tar_file:
-        members = tar_file.getmembers()
-
-        # Should have 2 files per job (json + bin)
-        assert len(members) == 2 * expected_jobs
-
-        # All files should have content
-        assert all(member.size > 8 for member in members)
-
-        member_names = [member.name for member in members]
-
-        # Check file naming convention
+    # Stream over the headers instead of materialising all members
+    with tarfile.open(tar_path, "r|*") as tar_file:
+        # Check file naming convention, content and file types in one pass
         user_prefix = f"{user}__"
-        assert all(name.startswith(user_prefix) for name in member_names)
-
-        # Check file types
-        json_files = [name for name in member_names if name.endswith(".json")]
-        bin_files = [name for name in member_names if name.endswith(".bin")]
+        n_members = n_json = n_bin = 0
+        for member in tar_file:
+            n_members += 1
+            assert member.name.startswith(user_prefix)
+            assert member.size > 8
+            if member.name.endswith(".json"):
+                n_json += 1
+            elif member.name.endswith(".bin"):
+                n_bin += 1
 
-        assert len(json_files) == expected_jobs
-        assert len(bin_files) == expected_jobs
+        # Should have 2 files per job (json + bin)
+        assert n_members == 2 * expected_jobs
+        assert n_json == expected_jobs
+        assert n_bin == expected_jobs
 
 
 def find_recent_tar(
@@ -262,25 +283,42 @@ def find_recent_tar(
     Path
         Path to the most recent matching tar file.
     """
-    now = pd.Timestamp.now().timestamp()
+    now = time.time()
     pattern = f"{user}__{study_pattern}__*"
-    tar_files = list(directory.glob(pattern))
-
-    for tar_path in tar_files:
-        # Parse timestamp from filename
-        timestamp_str = tar_path.name.split("__")[-1].split(".")[0]
-        timestamp_str = (
-            timestamp_str.replace("_", "T").replace("-", ":").replace(":", "-", 2)
-        )
 
-        try:
-            file_timestamp = pd.Timestamp(timestamp_str).timestamp()
-            if abs(now - file_timestamp) < tolerance_seconds:
-                return tar_path
-        except (ValueError, pd.errors.ParserError):
+    # Keep a running best instead of collecting all matches
+    best_path = None
+    best_timestamp = None
+    for tar_path in directory.glob(pattern):
+        match = _TAR_RE.fullmatch(tar_path.name)
+        if match is None:
             continue
+        file_timestamp = datetime.datetime(*map(int, match.groups())).timestamp()
+        if abs(now - file_timestamp) >= tolerance_seconds:
+            continue
+        if best_timestamp is None or file_timestamp > best_timestamp:
+            best_path = tar_path
+            best_timestamp = file_timestamp
+
+    if best_path is None:
+        raise FileNotFoundError(f"No recent tar file found matching {pattern}")
+    return best_path
 
-    raise FileNotFoundError(f"No recent tar file found matching {pattern}")
+
+def test_num_elements_follow_line_changes():
+    """Test that element counts reflect elements replaced under the same name."""
+    line = xt.Line(
+        elements=[xt.Drift(length=1.0), xt.Drift(length=2.0)],
+        element_names=["a", "b"],
+    )
+    line.build_tracker()
+    assert xb.submit._get_num_elements_from_line(line) == ({"Drift": 2}, 2)
+
+    line.element_dict["b"] = xt.Multipole(knl=[1e-4])
+    assert xb.submit._get_num_elements_from_line(line) == (
+        {"Drift": 1, "Multipole": 1},
+        2,
+    )
 
 
 @pytest.mark.skipif(
@@ -327,10 +365,12 @@ def test_submission(monkeypatch, registered_user, clean_directories):
         xb.JobSubmitter(registered_user, f"{TestConfig.STUDY_NAME}_3", line=line)
 
     # Validate submitted tar files
-    tar_files = list(
-        TestConfig.INPUT_DIR.glob(f"{registered_user}__{TestConfig.STUDY_NAME}_?__*")
-    )
-    assert len(tar_files) == 2
+    pattern = f"{registered_user}__{TestConfig.STUDY_NAME}_?__*"
+    with os.scandir(TestConfig.INPUT_DIR) as entries:
+        num_tar_files = sum(
+            1 for entry in entries if fnmatch.fnmatchcase(entry.name, pattern)
+        )
+    assert num_tar_files == 2
 
     # Find and validate the most recent tar
     recent_tar = find_recent_tar(
@@ -342,6 +382,95 @@ def test_submission(monkeypatch, registered_user, clean_directories):
     validate_tar_contents(recent_tar, TestConfig.num_jobs(), registered_user)
 
 
+@pytest.mark.skipif(
+    not TestConfig.directories_available(),
+    reason="Required directories are not available - Set testuser accordingly",
+)
+def test_add_many(monkeypatch, registered_user):
+    """Test that add_many produces the same jobs as successive calls to add."""
+    monkeypatch.setattr(xb.submit, "LOWER_TIME_BOUND", 0.0)
+
+    line = create_test_line()
+    rng = np.random.default_rng(TestConfig.RANDOM_SEED)
+    all_x = rng.standard_normal((3, TestConfig.PARTICLES_PER_JOB)) * 0.01
+    job_args = [
+        {
+            "job_name": f"job{i}",
+            "num_turns": TestConfig.NUM_TURNS,
+            "particles": xp.Particles(x=all_x[i]),
+            "checkpoint_every": TestConfig.CHECKPOINT_EVERY,
+            "extra_info": i,
+        }
+        for i in range(3)
+    ]
+    job_args[1]["ele_start"] = 1
+
+    jobs_add = xb.JobSubmitter(
+        registered_user, f"{TestConfig.STUDY_NAME}_add", line=line, dev_server=True
+    )
+    for args in job_args:
+        jobs_add.add(**args)
+    jobs_many = xb.JobSubmitter(
+        registered_user, f"{TestConfig.STUDY_NAME}_add", line=line, dev_server=True
+    )
+    jobs_many.add_many(job_args, max_workers=2)
+
+    assert jobs_many.get_job_summary() == jobs_add.get_job_summary()
+    members_add = read_unsubmitted_archive(jobs_add)
+    members_many = read_unsubmitted_archive(jobs_many)
+    assert len(members_add) == 6
+    assert members_many == members_add
+
+    # Jobs cannot bring their own line, and none of the jobs is added then
+    jobs = xb.JobSubmitter(
+        registered_user, f"{TestConfig.STUDY_NAME}_add", line=line, dev_server=True
+    )
+    with pytest.raises(ValueError):
+        jobs.add_many([job_args[0], {**job_args[1], "line": line}])
+    assert len(jobs) == 0
+
+    # A job failing validation releases the names of the jobs prepared before
+    # it, such that a retry gives the same jobs as before
+    with pytest.raises(ValueError):
+        jobs.add_many([*job_args[:2], {**job_args[2], "job_name": "job__2"}])
+    assert len(jobs) == 0
+    jobs.add_many(job_args)
+    assert jobs.get_job_summary()["jobs"] == jobs_add.get_job_summary()["jobs"]
+    assert read_unsubmitted_archive(jobs) == members_add
+
+
+@pytest.mark.skipif(
+    not TestConfig.directories_available(),
+    reason="Required directories are not available - Set testuser accordingly",
+)
+def test_unsubmitted_cleanup(monkeypatch, registered_user):
+    """Test that an unsubmitted JobSubmitter closes its archive and removes its files."""
+    monkeypatch.setattr(xb.submit, "LOWER_TIME_BOUND", 0.0)
+
+    jobs = xb.JobSubmitter(
+        registered_user,
+        f"{TestConfig.STUDY_NAME}_unsubmitted",
+        line=create_test_line(),
+        dev_server=True,
+    )
+    jobs.add(
+        job_name="job0",
+        num_turns=TestConfig.NUM_TURNS,
+        particles=xp.Particles(x=np.zeros(TestConfig.PARTICLES_PER_JOB)),
+        checkpoint_every=TestConfig.CHECKPOINT_EVERY,
+    )
+    tempdir = jobs._tempdir
+    archive = jobs._tar
+    assert tempdir.exists()
+    assert not archive.closed
+
+    del jobs
+    gc.collect()
+
+    assert archive.closed
+    assert not tempdir.exists()
+
+
 @pytest.mark.skipif(
     not TestConfig.directories_available(),
     reason="Required directories are not available - Set testuser accordingly",
@@ -353,9 +482,11 @@ def test_retrieval(registered_user):
 
     mock_tar_files_dir = xb._pkg_root.parent / "tests" / "data" / "example_output"
 
-    for tar_file in mock_tar_files_dir.glob("*.tar.gz"):
-        print(f"Copying {tar_file} to {output_dir}")
-        shutil.copy(tar_file, output_dir)
+    with os.scandir(mock_tar_files_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".tar.gz"):
+                print(f"Copying {entry.path} to {output_dir}")
+                shutil.copy(entry.path, output_dir)
 
     # Iterate through jobs and validate results
     for _, result_particles in xb.JobRetriever.iterate(
@@ -11,6 +11,8 @@
 # out-of-sync executables.
 # ==============================================================================
 
+from itertools import chain
+
 import xtrack as xt
 import xfields as xf
 import xcoll as xc
@@ -125,20 +127,18 @@ NON_TRACKING_ELEMENTS = [
     MultiSetter,
 ]
 
-default_element_classes = (
-    ONLY_XTRACK_ELEMENTS
-    + NO_SYNRAD_ELEMENTS
-    + DEFAULT_XF_ELEMENTS
-    + DEFAULT_XCOLL_ELEMENTS
-)
+# Ordered and free of duplicates, such that everything derived from it is reproducible
+default_element_classes = list(dict.fromkeys(chain(
+    ONLY_XTRACK_ELEMENTS,
+    NO_SYNRAD_ELEMENTS,
+    DEFAULT_XF_ELEMENTS,
+    DEFAULT_XCOLL_ELEMENTS,
+)))
 
 # The class ElementRefData is dynamically generated inside the tracker. We
 # extract it here and use it to create the line metadata inside XbInput
 ElementRefData = xt.tracker._element_ref_data_class_from_element_classes(
-    ONLY_XTRACK_ELEMENTS
-    + NO_SYNRAD_ELEMENTS
-    + DEFAULT_XF_ELEMENTS
-    + DEFAULT_XCOLL_ELEMENTS,
+    default_element_classes
 )
 if {f.name for f in ElementRefData._fields} != {'elements', 'names'}:
     raise RuntimeError("The definition of `ElementRefData` has changed inside Xtrack! "
@@ -152,9 +152,10 @@ def get_default_tracker():
     """
     Returns the default tracker used by Xboinc.
     """
-    assert_versions()
+    # Versions are only checked when building, a cached result was checked already
     if 'tracker' in _default_tracker_cache:
         return _default_tracker_cache['tracker']
+    assert_versions()
 
     line = xt.Line(elements=[])
 
@@ -173,9 +174,9 @@ def get_default_config():
     Returns the default config used by Xboinc.
     """
 
-    assert_versions()
     if 'config' in _default_tracker_cache:
         return _default_tracker_cache['config']
+    assert_versions()
 
     default_config_hash = get_default_tracker()._hashable_config()
     _default_tracker_cache['config'] = default_config_hash
@@ -187,9 +188,9 @@ def get_default_tracker_kernel():
     Returns the default tracker kernel used by Xboinc.
     """
 
-    assert_versions()
     if 'kernel' in _default_tracker_cache:
         return _default_tracker_cache['kernel']
+    assert_versions()
 
     # Now we trigger compilation
     get_default_tracker().get_track_kernel_and_data_for_present_config()
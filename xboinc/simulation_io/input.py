@@ -11,14 +11,15 @@
 # out-of-sync executables.
 # ==============================================================================
 
-import numpy as np
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
 
 import xobjects as xo
 import xpart as xp
 import xtrack as xt
 
-from .version import XbVersion, assert_versions
+from .version import XbVersion, _version_offset, assert_versions
 from .default_tracker import default_element_classes, get_default_config, ElementRefData
 from .output import XbState
 
@@ -30,9 +31,11 @@ from .output import XbState
 #       Can we cache by making the line_metadata in one buffer which we then always merge to a new one?
 #       Input creation should be faster than it is now (~4s)
 # The build time of the input file is largely dominated by the rebuilding of the
-# ElementRefData. For this reason we cache the line, such that when submitting
-# many jobs on the same line only the first job creation takes some time.
-_previous_line_cache = {}
+# ElementRefData. Nothing is cached per line: elements can be replaced under the
+# same name, and building a tracker moves their xobjects to another buffer, so
+# validating a cache entry costs as much as resolving the elements again.
+
+_DEFAULT_ELEMENT_NAMES = frozenset(d.__name__ for d in default_element_classes)
 
 _xboinc_context = xo.ContextCpu()
 
@@ -84,12 +87,24 @@ class XbInput(xo.Struct):
         kwargs.setdefault('_buffer', _xboinc_context.new_buffer())
         kwargs.setdefault('checkpoint_every', -1)
 
+        # Get the line, build the metadata after building the XoStruct
+        # We need to do it like this because the elements are not moved correctly
+        line = kwargs.pop('line', None)
+        if line is None:
+            raise ValueError("Need to provide `line`.")
+        if kwargs.pop('line_metadata', None) is not None:
+            raise ValueError("Cannot provide the line metadata directly!")
+        store_element_names = kwargs.pop('store_element_names', True)
+        # Snapshot the element names once, instead of walking the line repeatedly
+        element_names = line.element_names
+        num_elements = len(element_names)
+
         kwargs.setdefault('ele_start', 0)
         kwargs.setdefault('ele_stop', -1)  # Will be set to the number of elements in the line
         if isinstance(kwargs["ele_start"], str):
-            kwargs["ele_start"] = kwargs["line"].element_names.index(kwargs["ele_start"])
+            kwargs["ele_start"] = element_names.index(kwargs["ele_start"])
         if isinstance(kwargs["ele_stop"], str):
-            kwargs["ele_stop"] = kwargs["line"].element_names.index(kwargs["ele_stop"])
+            kwargs["ele_stop"] = element_names.index(kwargs["ele_stop"])
 
         # Pre-build particles / XbState; will be moved to correct buffer at XoStruct init
         particles = kwargs.pop('particles', None)
@@ -100,16 +115,10 @@ class XbInput(xo.Struct):
             kwargs['xb_state'] = XbState(particles=particles, _i_turn=0)
         elif xb_state is None or not isinstance(xb_state, XbState):
             raise ValueError("Need to provide `xb_state` or `particles`.")
-        # Get the line, build the metadata after building the XoStruct
-        # We need to do it like this because the elements are not moved correctly
-        line = kwargs.pop('line', None)
-        if kwargs.pop('line_metadata', None) is not None:
-            raise ValueError("Cannot provide the line metadata directly!")
-        store_element_names = kwargs.pop('store_element_names', True)
         super().__init__(**kwargs)
         self.line_metadata = _build_line_metadata(line, _buffer=self._buffer,
                                                   store_element_names=store_element_names)
-        self.num_elements = len(line.elements)
+        self.num_elements = num_elements
 
         # Start position
         if particles.start_tracking_at_element >= 0:
@@ -131,7 +140,7 @@ class XbInput(xo.Struct):
             self.ele_stop = self.num_elements
         else:
             if isinstance(self.ele_stop, str):
-                self.ele_stop = self.line.element_names.index(self.ele_stop)
+                self.ele_stop = element_names.index(self.ele_stop)
             assert self.ele_stop >= 0
             assert self.ele_stop <= self.num_elements
             if self.ele_stop <= self.ele_start:
@@ -156,20 +165,15 @@ class XbInput(xo.Struct):
         XbInput
         """
 
-        # Read binary
+        # Read binary directly into the buffer
         filename = Path(filename)
+        size = filename.stat().st_size
+        buffer_data = _xboinc_context.new_buffer(capacity=size)
         with filename.open('rb') as fid:
-            state_bytes = fid.read()
-        buffer_data = _xboinc_context.new_buffer(capacity=len(state_bytes))
-        buffer_data.buffer[:] = np.frombuffer(state_bytes, dtype=np.int8)
+            if fid.readinto(buffer_data.buffer) != size:
+                raise OSError(f"Could not read {filename} completely!")
         # Cast to XbVersion to verify versions of xsuite packages
-        version_offset = -1
-        for field in cls._fields:
-            if field.name == '_version':
-                version_offset = field.offset
-        if version_offset == -1:
-            raise ValueError("No xofield `_version` found in XbInput!")
-        xb_ver = XbVersion._from_buffer(buffer=buffer_data, offset=offset+version_offset)
+        xb_ver = XbVersion._from_buffer(buffer=buffer_data, offset=offset+cls._VERSION_OFFSET)
         if not xb_ver.assert_version(raise_error=raise_version_error, filename=filename):
             return None
         # Retrieve simulation input
@@ -181,8 +185,9 @@ class XbInput(xo.Struct):
 
         Parameters
         ----------
-        filename : pathlib.Path
-            The binary containing the simulation state.
+        filename : pathlib.Path or file-like
+            The binary containing the simulation state, or an open binary
+            file object to write to.
 
         Returns
         -------
@@ -190,9 +195,12 @@ class XbInput(xo.Struct):
         """
         _shrink(self._buffer)
         assert self._offset == 0
+        if hasattr(filename, 'write'):
+            filename.write(self._buffer.buffer)
+            return
         filename = Path(filename).expanduser().resolve()
         with filename.open('wb') as fid:
-            fid.write(self._buffer.buffer.tobytes())
+            fid.write(self._buffer.buffer)
 
     @property
     def version(self):
@@ -200,13 +208,19 @@ class XbInput(xo.Struct):
 
     @property
     def line(self):
+        # A new Line on every access, such that changes made by the caller to
+        # a returned line never leak into later ones. Only the element names
+        # are cached, the elements are dressed again as they are cheap views.
+        names = getattr(self, "_line_names_cache", None)
+        if names is None:
+            names = list(self.line_metadata.names)
+            if len(names) == 0:
+                n = len(self.line_metadata.elements)
+                digits = len(str(n - 1))
+                names = [f"el_{i:0{digits}d}" for i in range(n)]
+            self._line_names_cache = names
         elements = [el._DressingClass(_xobject=el) for el in self.line_metadata.elements]
-        names = self.line_metadata.names
-        if len(names) == 0:
-            n = len(elements)
-            digits = int(np.ceil(np.log10(n)))
-            names = [f"el_{i:>0{digits}}" for i in range(n)]
-        return xt.Line(elements=elements, element_names=names)
+        return xt.Line(elements=elements, element_names=list(names))
 
     @line.setter
     def line(self, val):
@@ -218,28 +232,39 @@ class XbInput(xo.Struct):
         return self.xb_state.particles
 
 
+XbInput._VERSION_OFFSET = _version_offset(XbInput)
+
+
 def _build_line_metadata(line, _buffer=None, store_element_names=True):
     # Create the ElementRefData from a given line
-    line_id = id(line)
-    # TODO: caching currently doesn't work
-    _previous_line_cache = {}
-    if line_id not in _previous_line_cache:
-        _check_config(line)
-        _check_compatible_elements(line)
-        if _buffer is None:
-            _buffer = _xboinc_context.new_buffer()
-        names = list(line.element_names) if store_element_names else []
-        element_ref_data = ElementRefData(
-            elements=len(line.element_names),
-            names=names,
-            _buffer=_buffer,
-        )
-        element_ref_data.elements = [
-            line.element_dict[name]._xobject for name in line.element_names
-        ]
-        _previous_line_cache[line_id] = element_ref_data
-
-    return _previous_line_cache[line_id]
+    element_names = line.element_names
+    xobjects = _checked_line_xobjects(line, element_names)
+    if _buffer is None:
+        _buffer = _xboinc_context.new_buffer()
+    names = list(element_names) if store_element_names else []
+    element_ref_data = ElementRefData(
+        elements=len(xobjects),
+        names=names,
+        _buffer=_buffer,
+    )
+    element_ref_data.elements = xobjects
+    return element_ref_data
+
+
+def _checked_line_xobjects(line, element_names):
+    # Check the line and resolve the xobjects of its elements
+    _check_config(line)
+    # Resolve through C-level map calls instead of per-element Python lookups
+    elements = list(map(line.element_dict.__getitem__, element_names))
+    _check_compatible_elements(elements)
+    return list(map(attrgetter('_xobject'), elements))
+
+
+@lru_cache(maxsize=1)
+def _default_config_keys():
+    # The option names of the default config, which does not change in a session
+    return frozenset(key for key, _ in get_default_config())
+
 
 def _check_config(line):
     # Check that the present config is on Xboinc
@@ -251,27 +276,30 @@ def _check_config(line):
         elif val != line.config[key]:
             print(f"Warning: Configuration option `{key}` set to `{line.config[key]}` "
                 + f"in line.config! Not supported by Xboinc. Overwritten to default `{val}`.")
-    for key in set(line.config.keys()) - {k[0] for k in default_config_hash}:
+    for key in line.config.keys() - _default_config_keys():
         print(f"Warning: Configuration option `{key}` requested in line.config!"
             + f"Not supported by Xboinc. Ignored.")
 
-def _check_compatible_elements(line):
+def _check_compatible_elements(elements):
     # Check that all elements are supported by Xboinc
-    default_elements = [d.__name__ for d in default_element_classes]
-    for ee in np.unique([ee.__class__.__name__ for ee in line.elements]):
-        if ee not in default_elements:
-            raise ValueError(f"Element of type {ee} not supported "
-                           + f"in this version of xboinc!")
+    unsupported = {type(ee).__name__ for ee in elements} - _DEFAULT_ELEMENT_NAMES
+    if unsupported:
+        raise ValueError(f"Element(s) of type {', '.join(sorted(unsupported))} not "
+                       + f"supported in this version of xboinc!")
 
 
 def _shrink(buffer):
     # Shrink a buffer by removing all free capacity
     if buffer.get_free() > 0:
         new_capacity = buffer.capacity - buffer.get_free()
-        newbuff = buffer._new_buffer(new_capacity)
-        buffer.copy_to_native(
-                dest=newbuff, dest_offset=0, source_offset=0, nbytes=new_capacity
-            )
+        if isinstance(buffer.context, xo.ContextCpu):
+            # Numpy buffer: copy the used part directly, without zero-filling a new one
+            newbuff = buffer.buffer[:new_capacity].copy()
+        else:
+            newbuff = buffer._new_buffer(new_capacity)
+            buffer.copy_to_native(
+                    dest=newbuff, dest_offset=0, source_offset=0, nbytes=new_capacity
+                )
         buffer.buffer = newbuff
         buffer.capacity = new_capacity
         buffer.chunks = []
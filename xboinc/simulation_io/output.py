@@ -12,13 +12,13 @@
 # ==============================================================================
 
 
+import os
 from pathlib import Path
 
-import numpy as np
 import xobjects as xo
 import xtrack as xt
 
-from .version import XbVersion, assert_versions
+from .version import XbVersion, _version_offset, assert_versions
 
 
 class XbState(xo.Struct):
@@ -61,22 +61,24 @@ class XbState(xo.Struct):
         XbState
         """
 
-        # Read binary
         filename = Path(filename)
+        context = xo.ContextCpu()
         with filename.open('rb') as fid:
-            state_bytes = fid.read()
-        buffer_data = xo.ContextCpu().new_buffer(capacity=len(state_bytes))
-        buffer_data.buffer[:] = np.frombuffer(state_bytes, dtype=np.int8)
-        # Cast to XbVersion to verify versions of xsuite packages
-        version_offset = -1
-        for field in cls._fields:
-            if field.name == '_version':
-                version_offset = field.offset
-        if version_offset == -1:
-            raise ValueError("No xofield `_version` found in XbState!")
-        xb_ver = XbVersion._from_buffer(buffer=buffer_data, offset=offset+version_offset)
-        if not xb_ver.assert_version(raise_error=raise_version_error, filename=filename):
-            return None
+            # Cast the header to XbVersion to verify versions of xsuite packages,
+            # before reading (and allocating) the full state
+            header = context.new_buffer(capacity=XbVersion._size)
+            fid.seek(offset + cls._VERSION_OFFSET)
+            if fid.readinto(header.buffer) != XbVersion._size:
+                raise OSError(f"Could not read the version from {filename}!")
+            xb_ver = XbVersion._from_buffer(buffer=header, offset=0)
+            if not xb_ver.assert_version(raise_error=raise_version_error, filename=filename):
+                return None
+            # Read binary directly into the buffer
+            size = os.fstat(fid.fileno()).st_size
+            buffer_data = context.new_buffer(capacity=size)
+            fid.seek(0)
+            if fid.readinto(buffer_data.buffer) != size:
+                raise OSError(f"Could not read {filename} completely!")
         # Retrieve simulation state
         return cls._from_buffer(buffer=buffer_data, offset=offset)
 
@@ -86,17 +88,21 @@ class XbState(xo.Struct):
 
         Parameters
         ----------
-        filename : pathlib.Path
-            The binary containing the simulation state.
+        filename : pathlib.Path or file-like
+            The binary containing the simulation state, or an open binary
+            file object to write to.
 
         Returns
         -------
         None.
         """
         assert self._offset == 0     # TODO: create new buffer if this is not the case (like when XbState inside XbInput)
+        if hasattr(filename, 'write'):
+            filename.write(self._buffer.buffer)
+            return
         filename = Path(filename).expanduser().resolve()
         with filename.open('wb') as fid:
-            fid.write(self._buffer.buffer.tobytes())
+            fid.write(self._buffer.buffer)
 
 
     @property
@@ -110,3 +116,6 @@ class XbState(xo.Struct):
     @property
     def i_turn(self):
         return self._i_turn
+
+
+XbState._VERSION_OFFSET = _version_offset(XbState)
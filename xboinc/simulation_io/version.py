@@ -70,3 +70,12 @@ class XbVersion(xo.Struct):
                 print(f"Warning: {error}")
                 return False
         return True
+
+
+# Offset of the version field in an xboinc struct (XbInput or XbState), which
+# is looked up once at import instead of at every from_binary
+def _version_offset(cls):
+    for field in cls._fields:
+        if field.name == '_version':
+            return field.offset
+    raise ValueError(f"No xofield `_version` found in {cls.__name__}!")
@@ -18,13 +18,24 @@ The module includes:
 """
 
 import datetime
+import inspect
+import io
+import itertools
 import json
+import multiprocessing
+import os
+import shutil
 import tarfile
-from time import sleep
+import tempfile
+import weakref
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from time import time
 from warnings import warn
 
 import numpy as np
 import xobjects as xo
+import xboinc as xb
 from tqdm.auto import tqdm
 
 from xaux import FsPath, eos_accessible
@@ -44,6 +55,7 @@ BENCHMARK_DATA = {
 LOWER_TIME_BOUND = 90  # seconds, minimum time for a job to be considered valid
 UPPER_TIME_BOUND = 3 * 24 * 60 * 60  # seconds, maximum time, 3 days
 SWEET_SPOT_TIME = 8 * 60 * 60 # seconds, default "ideal" time for a job, 8 hours
+_JOBS_IN_FLIGHT_PER_WORKER = 2  # binaries queued per add_many worker, bounds the memory
 
 
 def _get_num_elements_from_line(line):
@@ -71,10 +83,82 @@ def _get_num_elements_from_line(line):
     """
     if line is None:
         return {}, 0
-    elements = np.unique(
-        [ee.__class__.__name__ for ee in line.elements], return_counts=True
+    # Count per class in C first, and only then map the (few) classes to names
+    counts = Counter()
+    for cls, num in Counter(map(type, line.elements)).items():
+        counts[cls.__name__] += num
+    return dict(sorted(counts.items())), sum(counts.values())
+
+
+def _discard_job_files(tempdir, archive=None):
+    """
+    Close the submission archive and remove the temporary job files.
+
+    Parameters
+    ----------
+    tempdir : FsPath
+        The private temporary directory of a JobSubmitter.
+    archive : tarfile.TarFile, optional
+        The submission archive, if it was opened.
+    """
+    if archive is not None:
+        archive.close()
+    shutil.rmtree(tempdir, ignore_errors=True)
+
+
+def _build_job_binary(line, particles, num_turns, checkpoint_every, ele_start, ele_stop):
+    """
+    Build the binary XbInput of a job.
+
+    Returns
+    -------
+    io.BytesIO
+        The binary input, ready to be added to the submission archive.
+    """
+    data = XbInput(
+        num_turns=num_turns,
+        line=line,
+        checkpoint_every=checkpoint_every,
+        particles=particles,
+        store_element_names=False,
+        ele_start=ele_start,
+        ele_stop=-ele_stop,
     )
-    return dict(zip(*elements)), elements[1].sum()
+    bin_data = io.BytesIO()
+    data.to_binary(bin_data)
+    return bin_data
+
+
+# The line of the JobSubmitter, set once in each worker process of `add_many`
+_worker_line = None
+
+
+def _init_job_worker(line, skip_version_check):
+    """
+    Initialise a worker process of `JobSubmitter.add_many`.
+
+    Parameters
+    ----------
+    line : xtrack.Line
+        The line shared by all jobs.
+    skip_version_check : bool
+        The value of `xboinc._skip_xsuite_version_check` in the parent process.
+    """
+    global _worker_line
+    _worker_line = line
+    xb._skip_xsuite_version_check = skip_version_check
+
+
+def _build_job_binary_in_worker(*args):
+    """
+    Build the binary XbInput of a job on the line of the worker process.
+
+    Returns
+    -------
+    bytes
+        The binary input.
+    """
+    return _build_job_binary(_worker_line, *args).getvalue()
 
 
 class JobSubmitter:
@@ -175,12 +259,55 @@ class JobSubmitter:
         self._line = line
         self._num_elements, self._total_elements = _get_num_elements_from_line(line)
         self._submit_file = f"{self._user}__{self._study_name}__{timestamp()}.tar.gz"
-        self._json_files = []
-        self._bin_files = []
-        self._tempdir = FsPath(_tempdir.name).resolve()
+        self._job_summaries = []
+        self._tar = None
+        self._name_seq = itertools.count()  # To enforce different filenames
+        self._user_prefix = f"{self._user}__"
+        # Private subdirectory, such that all job files can be removed in one go
+        self._tempdir = FsPath(tempfile.mkdtemp(dir=_tempdir.name)).resolve()
+        # Remove the job files even if the JobSubmitter is never submitted
+        self._cleanup = weakref.finalize(self, _discard_job_files, self._tempdir)
         self._submitted = False
         self._unique_job_names = set()
 
+    def _open_archive(self):
+        """
+        Return the submission archive, creating it on first use.
+
+        Returns
+        -------
+        tarfile.TarFile
+            The .tar.gz archive in the temporary directory.
+        """
+        if self._tar is None:
+            # The binaries hardly compress, so a higher level only costs CPU time
+            self._tar = tarfile.open(
+                self._tempdir / self._submit_file, "w:gz", compresslevel=1
+            )
+            # From now on the cleanup has to close the archive as well
+            self._cleanup.detach()
+            self._cleanup = weakref.finalize(
+                self, _discard_job_files, self._tempdir, self._tar
+            )
+        return self._tar
+
+    def _add_to_archive(self, name, fileobj):
+        """
+        Append an in-memory file to the submission archive.
+
+        Parameters
+        ----------
+        name : str
+            The name of the member in the archive.
+        fileobj : io.BytesIO
+            The contents of the member.
+        """
+        info = tarfile.TarInfo(name)
+        info.size = fileobj.seek(0, io.SEEK_END)
+        info.mtime = time()
+        fileobj.seek(0)
+        self._open_archive().addfile(info, fileobj)
+
     def _assert_not_submitted(self):
         """
         Ensure that jobs have not already been submitted.
@@ -252,10 +379,12 @@ class JobSubmitter:
         Job execution time is estimated using benchmark data and must fall
         between LOWER_TIME_BOUND (90s) and UPPER_TIME_BOUND (3 days).
 
-        The method creates two files per job:
+        The method adds two files per job to the submission archive:
         - A .json file with job metadata
         - A .bin file with the binary simulation input data
 
+        Use `add_many` to build the binaries of many jobs in parallel.
+
         Examples
         --------
         >>> manager.add(
@@ -266,6 +395,168 @@ class JobSubmitter:
         ... )
         """
 
+        job = self._prepare_job(job_name, num_turns, particles, line, kwargs)
+        bin_data = _build_job_binary(
+            job["line"], particles, num_turns, checkpoint_every, ele_start, ele_stop
+        )
+        self._store_job(job, bin_data)
+
+    def add_many(self, jobs, max_workers=None):
+        """
+        Add several jobs at once, building their binaries in parallel.
+
+        All jobs are validated in the current process, in order, exactly like
+        in `add`. The binary inputs, which dominate the cost for large lines,
+        are then built by a pool of worker processes that each receive the
+        line of the JobSubmitter only once.
+
+        Parameters
+        ----------
+        jobs : iterable of dict
+            The jobs to add. Each dictionary holds the keyword arguments of
+            `add` for one job, except `line`.
+        max_workers : int, optional
+            The number of worker processes. Defaults to the number of CPUs,
+            and is never larger than the number of jobs.
+
+        Raises
+        ------
+        ValueError
+            If no line was provided at the JobSubmitter init, if a job provides
+            its own line, or for any of the reasons listed in `add`.
+
+        Notes
+        -----
+        Every worker is a freshly spawned Python process, which has to import
+        xsuite and compile the ContextCpu kernels again before building its
+        first binary. This takes several seconds per worker, so `add_many`
+        only pays off for many jobs on a large line; for a few small jobs a
+        plain loop over `add` is much faster.
+
+        Examples
+        --------
+        >>> manager.add_many(
+        ...     {"job_name": f"scan_point_{i}", "num_turns": 10000, "particles": parts}
+        ...     for i, parts in enumerate(particle_sets)
+        ... )
+        """
+        self._assert_not_submitted()
+        if self._line is None:
+            raise ValueError(
+                "Need to provide a line at the JobSubmitter init to use `add_many`!"
+            )
+        # Bind to the signature of `add`, such that both share the same defaults,
+        # and reject jobs with their own line before any job is prepared
+        signature = inspect.signature(self.add)
+        all_args = []
+        for job in jobs:
+            bound = signature.bind(**job)
+            bound.apply_defaults()
+            if bound.arguments["line"] is not None:
+                raise ValueError(
+                    "`add_many` only supports the line given at the JobSubmitter init!"
+                )
+            all_args.append(bound.arguments)
+        # The names and file numbers are reserved while preparing the jobs, so
+        # release those of the jobs that are not stored when anything fails
+        names_before = set(self._unique_job_names)
+        num_before = len(self._job_summaries)
+        first_seq = next(self._name_seq)
+        self._name_seq = itertools.count(first_seq)
+        try:
+            prepared = [
+                (
+                    self._prepare_job(
+                        args["job_name"],
+                        args["num_turns"],
+                        args["particles"],
+                        None,
+                        args["kwargs"],
+                    ),
+                    args,
+                )
+                for args in all_args
+            ]
+            self._build_and_store_jobs(prepared, max_workers)
+        except BaseException:
+            stored = self._job_summaries[num_before:]
+            self._unique_job_names = names_before | {job["job_name"] for job in stored}
+            self._name_seq = itertools.count(first_seq + len(stored))
+            raise
+
+    def _build_and_store_jobs(self, prepared, max_workers):
+        """
+        Build the binaries of prepared jobs in worker processes and store them.
+
+        Parameters
+        ----------
+        prepared : list of tuple
+            The jobs as returned by `_prepare_job`, each together with its
+            bound `add` arguments.
+        max_workers : int or None
+            The maximum number of worker processes.
+        """
+        if not prepared:
+            return
+
+        # Every worker pays the full startup cost, so never start more than jobs
+        max_workers = min(max_workers or os.cpu_count(), len(prepared))
+        # Spawn, as forking a process that holds compiled kernels is not safe
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_job_worker,
+            initargs=(self._line, xb._skip_xsuite_version_check),
+        ) as executor:
+            # Only keep a few jobs per worker in flight, such that no more than
+            # these binaries are held in memory at any time
+            max_in_flight = _JOBS_IN_FLIGHT_PER_WORKER * max_workers
+            to_submit = iter(prepared)
+            in_flight = deque()
+            while True:
+                for job, args in itertools.islice(
+                    to_submit, max_in_flight - len(in_flight)
+                ):
+                    future = executor.submit(
+                        _build_job_binary_in_worker,
+                        args["particles"],
+                        args["num_turns"],
+                        args["checkpoint_every"],
+                        args["ele_start"],
+                        args["ele_stop"],
+                    )
+                    in_flight.append((job, future))
+                if not in_flight:
+                    break
+                # Store in submission order, whatever order the workers finish in,
+                # and drop the future such that its binary can be freed
+                job, future = in_flight.popleft()
+                self._store_job(job, io.BytesIO(future.result()))
+                del future
+
+    def _prepare_job(self, job_name, num_turns, particles, line, kwargs):
+        """
+        Validate a job and build its metadata.
+
+        Parameters
+        ----------
+        job_name : str
+            The requested job name.
+        num_turns : int
+            The number of tracking turns.
+        particles : xpart.Particles
+            The particles to be tracked.
+        line : xtrack.Line or None
+            The line of the job, or None to use the line of the JobSubmitter.
+        kwargs : dict
+            Additional job metadata.
+
+        Returns
+        -------
+        dict
+            The (possibly renamed) job name, the line to use, the archive file
+            name, the json metadata and the expected execution time.
+        """
         self._assert_not_submitted()
         if "__" in job_name:
             raise ValueError(
@@ -303,10 +594,7 @@ class JobSubmitter:
             # If a new line is given, preprocess it
             num_elements, total_elements = _get_num_elements_from_line(line)
 
-        sleep(0.001)  # To enforce different filenames
-        filename = f"{self._user}__{timestamp(ms=True)}"
-        json_file = FsPath(self._tempdir, f"{filename}.json")
-        bin_file = FsPath(self._tempdir, f"{filename}.bin")
+        filename = f"{self._user_prefix}{timestamp(ms=True)}_{next(self._name_seq):06d}"
 
         # block if job expected to be too short or too long
         expected_time = (
@@ -336,30 +624,49 @@ class JobSubmitter:
             "job_name": job_name,
             "xboinc_ver": app_version,
             "num_elements": num_elements,
-            "num_part": len(particles.state[particles.state > 0]),
+            "num_part": int(np.count_nonzero(particles.state > 0)),
             "num_turns": num_turns,
             **kwargs,
         }
-        with json_file.open("w", encoding="utf-8") as fid:
-            json.dump(json_dict, fid, cls=xo.JEncoder)
-        data = XbInput(
-            num_turns=num_turns,
-            line=line,
-            checkpoint_every=checkpoint_every,
-            particles=particles,
-            store_element_names=False,
-            ele_start=ele_start,
-            ele_stop=-ele_stop,
+        return {
+            "job_name": job_name,
+            "line": line,
+            "filename": filename,
+            "json_dict": json_dict,
+            "num_particles": len(particles.x),
+            "expected_time": datetime_expected,
+        }
+
+    def _store_job(self, job, bin_data):
+        """
+        Write a prepared job into the submission archive.
+
+        Parameters
+        ----------
+        job : dict
+            The job as returned by `_prepare_job`.
+        bin_data : io.BytesIO
+            The binary XbInput of the job.
+        """
+        json_dict = job["json_dict"]
+        json_data = json.dumps(json_dict, cls=xo.JEncoder).encode("utf-8")
+        # Write the job straight into the submission archive
+        self._add_to_archive(f"{job['filename']}.json", io.BytesIO(json_data))
+        self._add_to_archive(f"{job['filename']}.bin", bin_data)
+        self._job_summaries.append(
+            {
+                "job_name": job["job_name"],
+                "num_turns": json_dict["num_turns"],
+                "num_particles": json_dict["num_part"],
+            }
         )
-        data.to_binary(bin_file)
-        self._json_files += [json_file]
-        self._bin_files += [bin_file]
         print(
-            f"Added job {job_name} for user {self._user} in study {self._study_name} "
-            + f"with {len(particles.x)} particles and {num_turns} turns."
-            + f" Expected execution time: {datetime_expected}."
+            f"Added job {job['job_name']} for user {self._user} in study {self._study_name} "
+            + f"with {job['num_particles']} particles and {json_dict['num_turns']} turns."
+            + f" Expected execution time: {job['expected_time']}."
         )
 
+
     def slice_and_add(
         self,
         *,
@@ -474,12 +781,12 @@ class JobSubmitter:
         """
         Package and submit all added jobs to the BOINC server.
 
-        This method creates a compressed tar archive containing all job files
-        and moves it to the user's submission directory where the BOINC server
+        This method finalises the compressed tar archive the jobs were written
+        to and moves it to the user's submission directory where the BOINC server
         will periodically check for new submissions.
 
         The submission process:
-        1. Creates a .tar.gz archive with all job files
+        1. Closes the .tar.gz archive with all job files
         2. Moves the archive to the appropriate submission directory
         3. Cleans up temporary files
         4. Marks the JobSubmitter as submitted
@@ -501,28 +808,21 @@ class JobSubmitter:
         Examples
         --------
         >>> manager.submit()
-        Zipping files: 100%|██████████| 4/4 [00:00<00:00, 1234.56it/s]
         Submitted 2 jobs to BOINC server for user user123 in study my_study.
         """
 
         self._assert_not_submitted()
-        with tarfile.open(self._tempdir / self._submit_file, "w:gz") as tar:
-            for thisfile in tqdm(
-                self._json_files + self._bin_files, desc="Zipping files"
-            ):
-                tar.add(thisfile, arcname=thisfile.name)
+        self._open_archive().close()
         if self._domain in ["eos", "afs"]:
             FsPath(self._tempdir / self._submit_file).move_to(self._target)
         else:
             raise ValueError(f"Wrong domain {self._domain} for user {self._user}!")
         self._submitted = True
         # clean up
-        for thisfile in self._json_files + self._bin_files:
-            thisfile.unlink()
-        # self._temp.cleanup()
+        self._cleanup()
 
         print(
-            f"Submitted {len(self._json_files)} jobs to BOINC server for user "
+            f"Submitted {len(self)} jobs to BOINC server for user "
             + f"{self._user} in study {self._study_name}."
         )
 
@@ -535,7 +835,7 @@ class JobSubmitter:
         int
             The number of jobs that have been added but not yet submitted.
         """
-        return len(self._json_files)
+        return len(self._job_summaries)
 
     def __repr__(self):
         """
@@ -579,17 +879,7 @@ class JobSubmitter:
         >>> for job in summary['jobs']:
         ...     print(f"Job {job['job_name']}: {job['num_particles']} particles, {job['num_turns']} turns")
         """
-        jobs = []
-        for f in self._json_files:
-            with open(f, "r") as infile:
-                job_data = json.load(infile)
-                jobs.append(
-                    {
-                        "job_name": job_data["job_name"],
-                        "num_turns": job_data["num_turns"],
-                        "num_particles": job_data["num_part"],
-                    }
-                )
+        jobs = [dict(job) for job in self._job_summaries]
 
         return {
             "user": self._user,